@@ -1,6 +1,6 @@
 """
 Mystic Companion Finder — A playful Streamlit companion app (single-file)
-- Minimal external libraries: streamlit, math, datetime, random, io, base64
+- Minimal external libraries: streamlit, numpy, math, datetime, io, base64
 - From-scratch, simplified astrological calculations for Sun/Moon longitudes and basic house placement (approximate)
 - Features:
   - Spirit-animal / guardian matching using occult synastry heuristics + phonetic "vibration matching"
@@ -18,11 +18,12 @@ How to run:
 DISCLAIMER: Astronomical/astrological formulas are simplified and intended for playful companion use only, not professional charting.
 """
 import streamlit as st
-from datetime import date, datetime, time
+import numpy as np
+from datetime import date, datetime, time, timedelta
 import math
-import random
 import io
 import base64
+from functools import lru_cache
 # ----------------------- Constants & Utilities -----------------------
 ZODIAC = [
     "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
@@ -34,36 +35,41 @@ SPIRIT_POOL = {
     'air': ["Raven 🪶", "Hawk 🦅", "Sphinx 🦁🪶"],
     'water': ["Otter 🦦", "Koi 🐟", "Selkie 🧜‍♀️"]
 }
+ALL_SPIRITS = tuple(s for pool in SPIRIT_POOL.values() for s in pool)
+# Element of each sign, indexed like ZODIAC (Aries fire, Taurus earth, ...)
+ZODIAC_ELEMENTS = ('fire', 'earth', 'air', 'water') * 3
+_DEG2RAD = math.pi / 180.0
 PHRASE_POOLS = {
-    "fiery": [
+    "fiery": (
         "Rise and blaze — start that streak you've been thinking of. 🔥",
         "Spark, don't scorch: channel your heat into clean action. 🔥",
         "A bold first step wins more than a perfect plan. 🚀",
         "Ignite your passion and let it guide you through the day. 🌟",
         "Embrace the fire within; it's your greatest ally. 🛡️"
-    ],
-    "airy": [
+    ),
+    "airy": (
         "Playful curiosity will find you better doors today. 🌬️",
         "Breeze through clutter — ideas thrive in open spaces. 💨",
         "Share one story; you'll find the thread you need. 🧵",
         "Let your thoughts soar like the wind. 🕊️",
         "Connect the dots with a light-hearted approach. 🔗"
-    ],
-    "earthy": [
+    ),
+    "earthy": (
         "Small steady work adds up — plant one seed today. 🌱",
         "Organize a single corner of your life and watch momentum grow. 🪴",
         "Trust the slow, quiet progress underfoot. 🪨",
         "Ground yourself in nature's rhythm. 🌳",
         "Build foundations that last a lifetime. 🏰"
-    ],
-    "watery": [
+    ),
+    "watery": (
         "Feel before you speak; your subtlety is your strength. 🌊",
         "Let intuition polish the edges of a choice tonight. 🌕",
         "A humane touch heals where logic cannot. 🤲",
         "Flow with the currents of emotion. 🌀",
         "Dive deep into your inner wisdom. 🐚"
-    ]
+    )
 }
+_PHRASE_LENS = {k: len(v) for k, v in PHRASE_POOLS.items()}
 # Expanded persona variations for spirits
 PERSONA_VARIATIONS = {
     "Phoenix 🔥": {"persona": "Wise and reborn, offering guidance on transformation.", "style": "fiery"},
@@ -79,6 +85,8 @@ PERSONA_VARIATIONS = {
     "Koi 🐟": {"persona": "Resilient fish, symbolizing perseverance.", "style": "watery"},
     "Selkie 🧜‍♀️": {"persona": "Shape-shifting seal, exploring emotions.", "style": "watery"}
 }
+PERSONA_STYLE = {k: v['style'] for k, v in PERSONA_VARIATIONS.items()}
+PERSONA_TEXT = {k: v['persona'] for k, v in PERSONA_VARIATIONS.items()}
 # Simple SVG placeholders
 SVG_PLACEHOLDERS = {
     "Phoenix 🔥": """
@@ -166,40 +174,53 @@ SVG_PLACEHOLDERS = {
     </svg>
     """
 }
+# Pre-encoded <img> tags so the gallery doesn't re-send raw SVG markup each rerun.
+# As standalone image/svg+xml documents the root needs the SVG namespace.
+SVG_RENDERED = {
+    name: '<img src="data:image/svg+xml;base64,{}" width="100">'.format(
+        base64.b64encode(svg.replace('<svg ', '<svg xmlns="http://www.w3.org/2000/svg" ', 1).encode()).decode()
+    )
+    for name, svg in SVG_PLACEHOLDERS.items()
+}
 # ----------------------- Astronomical helpers (simplified) -----------------------
-def to_julian_day(dt: datetime) -> float:
-    year = dt.year
-    month = dt.month
-    day = dt.day + (dt.hour + (dt.minute + dt.second / 60.0) / 60.0) / 24.0
-    if month <= 2:
-        year -= 1
-        month += 12
-    A = year // 100
-    B = 2 - A + (A // 4)
-    jd = int(365.25 * (year + 4716)) + int(30.6001 * (month + 1)) + day + B - 1524.5
-    return jd
-def sun_ecliptic_longitude(jd: float) -> float:
+@lru_cache(maxsize=256)
+def to_julian_day(year: int, month: int, day: int, hour: int, minute: int, second: int) -> float:
+    # Integer Julian day number at noon, then the fractional day offset
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    jdn = day + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+    return jdn + (hour - 12) / 24 + minute / 1440 + second / 86400
+def compute_sun_moon(jd: float) -> tuple:
+    # Both series share the same day offset, so evaluate them together
     d = jd - 2451545.0
     L = (280.460 + 0.9856474 * d) % 360
-    g = (357.528 + 0.9856003 * d) % 360
-    lambda_sun = L + 1.915 * math.sin(math.radians(g)) + 0.020 * math.sin(math.radians(2 * g))
-    return lambda_sun % 360
-def moon_ecliptic_longitude(jd: float) -> float:
-    d = jd - 2451545.0
+    g_r = ((357.528 + 0.9856003 * d) % 360) * _DEG2RAD
+    sun_lon = L + 1.915 * math.sin(g_r) + 0.020 * math.sin(2 * g_r)
     Lm = (218.316 + 13.176396 * d) % 360
-    Mm = (134.963 + 13.064993 * d) % 360
-    D = (297.850 + 12.190749 * d) % 360
-    lon = Lm + 6.289 * math.sin(math.radians(Mm))
-    lon += 1.274 * math.sin(math.radians(2 * D - Mm))
-    lon += 0.658 * math.sin(math.radians(2 * D))
-    lon += 0.213 * math.sin(math.radians(2 * Mm))
-    return lon % 360
-def moon_phase_illumination(jd: float) -> float:
-    ls = sun_ecliptic_longitude(jd)
-    lm = moon_ecliptic_longitude(jd)
-    phase_angle = (lm - ls) % 360
+    Mm_r = ((134.963 + 13.064993 * d) % 360) * _DEG2RAD
+    D2_r = 2 * ((297.850 + 12.190749 * d) % 360) * _DEG2RAD
+    moon_lon = Lm + 6.289 * math.sin(Mm_r)
+    moon_lon += 1.274 * math.sin(D2_r - Mm_r)
+    moon_lon += 0.658 * math.sin(D2_r)
+    moon_lon += 0.213 * math.sin(2 * Mm_r)
+    return sun_lon % 360, moon_lon % 360
+def moon_phase_illumination(sun_lon: float, moon_lon: float) -> float:
+    phase_angle = (moon_lon - sun_lon) % 360
     illum = (1 - math.cos(math.radians(phase_angle))) * 50.0
     return round(illum, 1)
+def moon_phase_range(jd_array: np.ndarray) -> np.ndarray:
+    # Vectorized compute_sun_moon + moon_phase_illumination over many days at once
+    d = jd_array - 2451545.0
+    L = (280.460 + 0.9856474 * d) % 360
+    g = np.deg2rad((357.528 + 0.9856003 * d) % 360)
+    sun_lon = L + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g)
+    Lm = (218.316 + 13.176396 * d) % 360
+    Mm = np.deg2rad((134.963 + 13.064993 * d) % 360)
+    D = np.deg2rad((297.850 + 12.190749 * d) % 360)
+    moon_lon = Lm + 6.289 * np.sin(Mm) + 1.274 * np.sin(2 * D - Mm) + 0.658 * np.sin(2 * D) + 0.213 * np.sin(2 * Mm)
+    phase_angle = np.deg2rad((moon_lon - sun_lon) % 360)
+    return np.round((1 - np.cos(phase_angle)) * 50.0, 1)
 # Improved sidereal time calculation for ascendant
 def gmst(jd: float) -> float:
     d = jd - 2451545.0
@@ -211,20 +232,54 @@ def obliquity_of_ecliptic(jd: float) -> float:
     t = (jd - 2451545.0) / 36525.0
     eps = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
     return eps
+def _make_ascendant_fn(lat: float, jd_epoch: float):
+    # Fold the per-observer latitude and obliquity terms into a closure over the sidereal angle
+    tan_lat = math.tan(math.radians(lat))
+    eps = math.radians(obliquity_of_ecliptic(jd_epoch))
+    sin_eps = math.sin(eps)
+    cos_eps = math.cos(eps)
+    def ascendant(lst: float) -> float:
+        cos_lst = math.cos(lst)
+        sin_lst = math.sin(lst)
+        tan_asc = -cos_lst / (sin_lst * sin_eps + tan_lat * cos_eps)
+        asc = math.degrees(math.atan(tan_asc)) % 360
+        # Adjust quadrant
+        if cos_lst > 0:
+            asc += 180
+        elif sin_lst < 0:
+            asc += 360
+        return asc % 360
+    return ascendant
 def approximate_ascendant_longitude(jd: float, latitude: float, longitude: float) -> float:
-    lst_deg = local_sidereal_time(jd, longitude)
-    lst = math.radians(lst_deg)
-    lat_rad = math.radians(latitude)
-    eps = math.radians(obliquity_of_ecliptic(jd))
-    tan_asc = -math.cos(lst) / (math.sin(lst) * math.sin(eps) + math.tan(lat_rad) * math.cos(eps))
-    asc = math.degrees(math.atan(tan_asc)) % 360
-    # Adjust quadrant
-    if math.cos(lst) > 0:
-        asc += 180
-    elif math.sin(lst) < 0:
-        asc += 360
-    return asc % 360
+    lst = math.radians(local_sidereal_time(jd, longitude))
+    return _make_ascendant_fn(latitude, jd)(lst)
+@st.cache_data
+def compute_chart(birth_iso: str, lat: float, lon: float) -> dict:
+    # Cached per (birth moment, location) so reruns skip the trig work
+    dt = datetime.fromisoformat(birth_iso)
+    jd = to_julian_day(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+    sun_lon, moon_lon = compute_sun_moon(jd)
+    sun_idx = int(sun_lon // 30) % 12
+    moon_idx = int(moon_lon // 30) % 12
+    return {
+        'sun_lon': sun_lon,
+        'moon_lon': moon_lon,
+        'moon_illum': moon_phase_illumination(sun_lon, moon_lon),
+        'asc_lon': approximate_ascendant_longitude(jd, lat, lon),
+        'sun_idx': sun_idx,
+        'moon_idx': moon_idx,
+        'sun_sign': ZODIAC[sun_idx],
+        'moon_sign': ZODIAC[moon_idx],
+    }
+@st.cache_data
+def compute_phase_strip(target_iso: str, days: int = 30) -> np.ndarray:
+    # Illumination at 12:00 (same zone-less, effectively UT, convention as the birth time)
+    # for `days` consecutive days from the target date
+    t = date.fromisoformat(target_iso)
+    jd0 = to_julian_day(t.year, t.month, t.day, 12, 0, 0)
+    return moon_phase_range(jd0 + np.arange(days))
 # ----------------------- Zodiac & house (very simplified) -----------------------
+@lru_cache(maxsize=256)
 def zodiac_from_longitude(lon_deg: float) -> str:
     idx = int(lon_deg // 30) % 12
     return ZODIAC[idx]
@@ -234,59 +289,73 @@ def house_from_longitude(planet_lon: float, asc_lon: float) -> int:
     house = int(diff // 30) + 1
     return house
 # ----------------------- Matching logic -----------------------
+@lru_cache(maxsize=256)
 def tone_seed_from_birth(birth_date: date) -> str:
     s = (birth_date.day + birth_date.month) % 4
     return ["fiery", "airy", "earthy", "watery"][s]
+@lru_cache(maxsize=256)
 def phonetic_vibration(name: str) -> str:
     # Simple phonetic vibration: count vowels -> map to angelic/animal realms
     vowels = sum(1 for ch in name.lower() if ch in 'aeiou')
     return ['angelic', 'animal', 'spirit', 'elemental'][vowels % 4]
+_BIO = ('tropical', 'temperate', 'boreal')
+@lru_cache(maxsize=256)
 def bioregional_tone(latitude: float) -> str:
     # Near equator -> more tropical / water/fire suggestions
     lat_abs = abs(latitude)
-    if lat_abs < 15:
-        return 'tropical'
-    elif lat_abs < 45:
-        return 'temperate'
-    else:
-        return 'boreal'
-def match_spirits(sun_sign: str, moon_sign: str, tone: str, vib: str, bio: str, rng: random.Random):
+    return _BIO[(lat_abs >= 15) + (lat_abs >= 45)]
+_MASK64 = (1 << 64) - 1
+def _mix(seed: int, salt: int) -> int:
+    # Cheap 64-bit hash of (seed, salt) used in place of a seeded random.Random
+    x = (seed * 6364136223846793005 + salt * 1442695040888963407) & _MASK64
+    x ^= x >> 33
+    x = (x * 0xff51afd7ed558ccd) & _MASK64
+    return x ^ (x >> 33)
+@lru_cache(maxsize=256)
+def match_spirits(sun_idx: int, moon_idx: int, tone: str, vib: str, bio: str, seed: int) -> tuple:
     # Combine signals to pick 2-3 companions
-    element_map = {
-        'Aries':'fire','Taurus':'earth','Gemini':'air','Cancer':'water','Leo':'fire','Virgo':'earth',
-        'Libra':'air','Scorpio':'water','Sagittarius':'fire','Capricorn':'earth','Aquarius':'air','Pisces':'water'
-    }
     picks = []
-    primary_el = element_map.get(sun_sign, 'earth')
-    secondary_el = element_map.get(moon_sign, 'water')
+    sun_sign = ZODIAC[sun_idx]
+    moon_sign = ZODIAC[moon_idx]
+    primary_el = ZODIAC_ELEMENTS[sun_idx]
+    secondary_el = ZODIAC_ELEMENTS[moon_idx]
     # pick primary spirit
-    sp = rng.choice(SPIRIT_POOL[primary_el])
+    pool = SPIRIT_POOL[primary_el]
+    sp = pool[_mix(seed, 1) % len(pool)]
     picks.append({'role':'Primary Familiar', 'spirit':sp, 'reason':f'Born under {sun_sign} ({primary_el})'})
     # pick secondary
-    sp2 = rng.choice(SPIRIT_POOL[secondary_el])
+    pool = SPIRIT_POOL[secondary_el]
+    sp2 = pool[_mix(seed, 2) % len(pool)]
     picks.append({'role':'Guardian', 'spirit':sp2, 'reason':f'Moon in {moon_sign} ({secondary_el})'})
     # add vibration-based pick
-    vib_pick = rng.choice(sum(SPIRIT_POOL.values(), []))
+    vib_pick = ALL_SPIRITS[_mix(seed, 3) % len(ALL_SPIRITS)]
     picks.append({'role':'Whisperer', 'spirit':vib_pick, 'reason':f'Phonetic vibe: {vib}, bioregion: {bio}'})
-    return picks
+    return tuple(picks)
+def store_picks(state, picks: tuple) -> None:
+    # Derive per-pick lookups once so the gallery and chat don't rebuild them
+    state['picks'] = picks
+    state['pick_spirits'] = tuple(p['spirit'] for p in picks)
+    state['pick_elements'] = tuple(PERSONA_STYLE.get(p['spirit'], 'fiery') for p in picks)
+    state['spirit_styles'] = {p['spirit']: PERSONA_STYLE.get(p['spirit'], 'fiery') for p in picks}
 # ----------------------- Chat generation & export -----------------------
-def generate_alispar_response(name: str, sun_sign: str, moon_sign: str, tone: str, spirit: str, rng: random.Random) -> str:
+def generate_alispar_response(name: str, sun_sign: str, moon_sign: str, style: str, spirit: str, seed: int) -> str:
     title = "Your Mystic Companion"
     greeting = f"{title} 🧚: Hello {name.split()[0]}!"
-    persona = PERSONA_VARIATIONS.get(spirit, {"persona": "Mystic guide", "style": tone})
-    phrase = rng.choice(PHRASE_POOLS[persona["style"]])
-    flavor = f"With Sun in {sun_sign} and Moon in {moon_sign}, {phrase} As your {persona['persona']}, I say..."
+    phrase = PHRASE_POOLS[style][_mix(seed, 4) % _PHRASE_LENS[style]]
+    flavor = f"With Sun in {sun_sign} and Moon in {moon_sign}, {phrase} As your {PERSONA_TEXT.get(spirit, 'Mystic guide')}, I say..."
     return greeting + " " + flavor
-def make_chat_download(chat_log: list) -> tuple:
-    txt = "\n".join(chat_log)
-    b = txt.encode('utf-8')
-    b64 = base64.b64encode(b).decode()
-    href = f"data:file/txt;base64,{b64}"
-    return href, txt
+def format_chat_line(line: str) -> str:
+    if line.startswith('You:'):
+        return f"**{line}**"
+    return f":sparkles: {line}"
+def append_chat_line(state, line: str) -> None:
+    # Keep the raw text and rendered markdown buffers in step with the log
+    state['chat_log'].append(line)
+    state['chat_text'] += line + "\n"
+    state['chat_rendered'] += format_chat_line(line) + "\n\n"
 # ----------------------- Streamlit App -----------------------
-def app():
-    # Custom CSS for themed colors and animations, with dark mode support
-    st.markdown("""
+# Custom CSS for themed colors and animations, with dark mode support
+_CSS = """
     <style>
     .stApp {
         /* Use Streamlit's default background */
@@ -374,12 +443,15 @@ def app():
         color: #ffffff;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+def app():
+    st.markdown(_CSS, unsafe_allow_html=True)
     
     st.set_page_config(page_title="Mystic Companion Finder 🧭✨", layout="wide")
     st.title("Mystic Companion Finder — Find your spirit companion! 🧚‍♀️🦄🔥")
     st.markdown("A playful app that **matches** you with a spirit animal, guardian angel, or mythical familiar using simplified occult synastry, phonetic vibration matching, and bioregional folklore. 🌍✨")
-    with st.sidebar:
+    # Batch sidebar inputs in a form so edits only rerun the chart on submit
+    with st.sidebar.form("birth_form"):
         st.header("Birth & Location (defaults)")
         name = st.text_input("Name", value="Mahan H R Gowda")
         birth_date = st.date_input("Birth Date", value=date(1993,7,12), min_value=date(1900,1,1), max_value=date(2100,12,31))
@@ -390,21 +462,35 @@ def app():
         st.markdown("---")
         st.header("Target Date")
         target_date = st.date_input("Target Date", value=date(2025,11,1), min_value=date(1900,1,1), max_value=date(2100,12,31))
-        if st.button("Match me! 🔮"):
-            st.session_state['matched'] = True
-            st.session_state['picks'] = None  # Reset picks
+        submitted = st.form_submit_button("Match me! 🔮")
+    if submitted or 'birth_inputs' not in st.session_state:
+        st.session_state['birth_inputs'] = {
+            'name': name, 'birth_date': birth_date, 'birth_time': birth_time,
+            'lat': lat, 'lon': lon, 'target_date': target_date,
+        }
+    if submitted:
+        st.session_state['matched'] = True
+        st.session_state['picks'] = None  # Reset picks
+    inputs = st.session_state['birth_inputs']
+    name = inputs['name']
+    birth_date = inputs['birth_date']
+    birth_time = inputs['birth_time']
+    lat = inputs['lat']
+    lon = inputs['lon']
+    target_date = inputs['target_date']
     # compute positions
     birth_dt = datetime.combine(birth_date, birth_time)
-    jd = to_julian_day(birth_dt)
-    sun_lon = sun_ecliptic_longitude(jd)
-    moon_lon = moon_ecliptic_longitude(jd)
-    moon_illum = moon_phase_illumination(jd)
-    sun_sign = zodiac_from_longitude(sun_lon)
-    moon_sign = zodiac_from_longitude(moon_lon)
-    asc_lon = approximate_ascendant_longitude(jd, lat, lon)
-    # seed RNG deterministically
+    chart = compute_chart(birth_dt.isoformat(), float(lat), float(lon))
+    sun_lon = chart['sun_lon']
+    moon_lon = chart['moon_lon']
+    moon_illum = chart['moon_illum']
+    sun_sign = chart['sun_sign']
+    moon_sign = chart['moon_sign']
+    sun_idx = chart['sun_idx']
+    moon_idx = chart['moon_idx']
+    asc_lon = chart['asc_lon']
+    # deterministic seed for all picks
     seed_val = birth_date.day + birth_date.month + birth_date.year + birth_time.hour + birth_time.minute
-    rng = random.Random(seed_val)
     tone = tone_seed_from_birth(birth_date)
     vib = phonetic_vibration(name)
     bio = bioregional_tone(lat)
@@ -421,28 +507,40 @@ def app():
         st.markdown("---")
         st.subheader("Harmony Meter — Moon Sync 🌕")
         harmony_value = int(round(moon_illum))
-        st.progress(harmony_value / 100.0, text=f"Harmony: {harmony_value}%")
+        st.markdown(
+            f'<div class="harmony-meter" style="background:linear-gradient(90deg,#4CAF50 {harmony_value}%,#333 {harmony_value}%);height:20px;border-radius:10px"></div>'
+            f'<small>Harmony: {harmony_value}%</small>',
+            unsafe_allow_html=True,
+        )
         waxing = 'Waxing' if 0 < ((moon_lon - sun_lon) % 360) < 180 else 'Waning'
         st.caption(f"{waxing} phase. Your spirit's energy: {tone} tone.")
         st.markdown("---")
+        st.subheader("Moon Phases from Target Date 🌗")
+        strip = compute_phase_strip(target_date.isoformat())
+        st.line_chart(
+            {"Date": [target_date + timedelta(days=i) for i in range(len(strip))], "Illumination %": strip},
+            x="Date",
+        )
+        st.caption(f"30 days of moon illumination starting {target_date.isoformat()}.")
+        st.markdown("---")
         st.subheader("Matching Logic 🧭")
         st.write("We combine Sun element, Moon element, phonetic vibration, and bioregional flavor to propose companions. This is playful and symbolic — enjoy! ✨")
         if st.button("Generate Match Now 🐾"):
             st.session_state['matched'] = True
-            st.session_state['picks'] = match_spirits(sun_sign, moon_sign, tone, vib, bio, rng)
+            store_picks(st.session_state, match_spirits(sun_idx, moon_idx, tone, vib, bio, seed_val))
     with col2:
         st.subheader("Gallery of Matched Companions 🎨🖼️")
         if st.session_state.get('matched', False):
-            picks = st.session_state.get('picks') or match_spirits(sun_sign, moon_sign, tone, vib, bio, rng)
-            for i, p in enumerate(picks):
-                element = PERSONA_VARIATIONS.get(p['spirit'], {"style": "fiery"})["style"]
+            if not st.session_state.get('picks'):
+                store_picks(st.session_state, match_spirits(sun_idx, moon_idx, tone, vib, bio, seed_val))
+            for i, p in enumerate(st.session_state['picks']):
+                element = st.session_state['pick_elements'][i]
                 with st.expander(f"{p['role']}: {p['spirit']}"):
                     st.markdown(f'<div data-element="{element}">', unsafe_allow_html=True)
                     st.write(f"**Role:** {p['role']} — **Spirit:** {p['spirit']}")
                     st.write(f"**Reason:** {p['reason']}")
                     # SVG illustration
-                    svg = SVG_PLACEHOLDERS.get(p['spirit'], "<svg width='100' height='100'></svg>")
-                    st.markdown(svg, unsafe_allow_html=True)
+                    st.markdown(SVG_RENDERED.get(p['spirit'], ''), unsafe_allow_html=True)
                     st.write("A stylized portrait for your imagination. 🥰")
                     st.markdown("</div>", unsafe_allow_html=True)
         else:
@@ -451,31 +549,29 @@ def app():
     st.subheader("Interactive Chat Simulation 💬")
     if 'chat_log' not in st.session_state:
         st.session_state['chat_log'] = []
+        st.session_state['chat_text'] = ""
+        st.session_state['chat_rendered'] = ""
     user_msg = st.text_input("You to your companion:", value="Hello, who are you?", key='chat_input')
     if st.button("Send Message ✉️"):
         if not st.session_state.get('matched', False):
             st.warning("Please generate a match first so your companion is ready to reply! 🌟")
         else:
             # user's message
-            st.session_state['chat_log'].append(f"You: {user_msg}")
-            # Select a random spirit for response
-            picks = st.session_state.get('picks') or match_spirits(sun_sign, moon_sign, tone, vib, bio, rng)
-            spirit = rng.choice([p['spirit'] for p in picks])
-            # advance RNG deterministically
-            rng.random(); rng.random()
-            reply = generate_alispar_response(name, sun_sign, moon_sign, tone, spirit, rng)
-            st.session_state['chat_log'].append(f"{spirit}: {reply}")
+            append_chat_line(st.session_state, f"You: {user_msg}")
+            # Select a spirit for the response, varying with the turn number
+            if not st.session_state.get('picks'):
+                store_picks(st.session_state, match_spirits(sun_idx, moon_idx, tone, vib, bio, seed_val))
+            turn_seed = _mix(seed_val, len(st.session_state['chat_log']))
+            spirit = st.session_state['pick_spirits'][turn_seed % len(st.session_state['pick_spirits'])]
+            reply = generate_alispar_response(name, sun_sign, moon_sign, st.session_state['spirit_styles'][spirit], spirit, turn_seed)
+            append_chat_line(st.session_state, f"{spirit}: {reply}")
     # show chat log
     st.write("**Chat Log**")
-    for line in st.session_state['chat_log']:
-        if line.startswith('You:'):
-            st.markdown(f"**{line}**")
-        else:
-            st.markdown(f":sparkles: {line}")
+    if st.session_state['chat_rendered']:
+        st.markdown(st.session_state['chat_rendered'])
     # export chat
     if st.session_state['chat_log']:
-        href, txt = make_chat_download(st.session_state['chat_log'])
-        st.markdown(f"[Download chat log as TXT 📥]({href})")
+        st.download_button("Download chat log 📥", data=st.session_state['chat_text'], file_name='chat.txt', mime='text/plain')
     st.markdown("---")
     st.subheader("Extra Options & UI Play 🎭")
     st.write("- Use emojis throughout to set tone. ✨\n- Placeholder images are SVG-based for a lightweight app. 🎨\n- For prettier graphics we can add external images later. 🖼️")